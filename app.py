@@ -11,12 +11,27 @@ if __name__ == "__main__":
     port = int(os.getenv("PORT", 7860))
     host = os.getenv("HOST", "0.0.0.0")
     
+    # Worker processes: opt in with WEB_CONCURRENCY (or UVICORN_WORKERS), default 1
+    # Each worker loads FastEmbed/LiteLLM/Agents SDK and opens its own DB pool (5 + 10),
+    # and os.cpu_count() reports host CPUs rather than the container quota
+    workers = int(
+        os.getenv("WEB_CONCURRENCY")
+        or os.getenv("UVICORN_WORKERS")
+        or 1
+    )
+    
     # Start the FastAPI app
+    # loop/http "auto" pick uvloop + httptools (shipped with uvicorn[standard]) when
+    # installed and fall back to asyncio + h11 where they are not (uvloop is not
+    # available on Windows); access logging is disabled on the hot path
     uvicorn.run(
         "app.main:app",
         host=host,
         port=port,
-        workers=1,
-        log_level="info"
+        loop="auto",
+        http="auto",
+        workers=workers,
+        log_level="info",
+        access_log=False,
     )
 
@@ -3,8 +3,7 @@ API routes for embeddings ingestion
 Handles batch processing of textbook content into Qdrant
 """
 from fastapi import APIRouter, HTTPException, Depends, Request
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+from app.config import limiter
 from app.models.schemas import EmbeddingIngestRequest, EmbeddingIngestResponse
 from app.services.embeddings_service import (
     create_qdrant_collection,
@@ -21,7 +20,6 @@ import os
 
 router = APIRouter()
 logger = setup_logger(__name__)
-limiter = Limiter(key_func=get_remote_address)
 
 
 @router.post("/ingest", response_model=EmbeddingIngestResponse)
@@ -85,7 +85,7 @@ async def signup(
         return SignupResponse(
             success=True,
             message="User created successfully",
-            user=UserResponse.from_orm(user),
+            user=UserResponse.model_validate(user),
             tokens=TokenResponse(
                 access_token=access_token,
                 refresh_token=refresh_token,
@@ -181,7 +181,7 @@ async def signin(
         return SigninResponse(
             success=True,
             message="User signed in successfully",
-            user=UserResponse.from_orm(user),
+            user=UserResponse.model_validate(user),
             tokens=TokenResponse(
                 access_token=access_token,
                 refresh_token=refresh_token,
@@ -277,7 +277,7 @@ async def get_current_user(
                 }
             )
 
-        return UserResponse.from_orm(user)
+        return UserResponse.model_validate(user)
 
     except HTTPException:
         raise
@@ -4,15 +4,49 @@ Authentication Schemas
 Pydantic models for request/response validation in authentication endpoints.
 """
 
-from pydantic import BaseModel, EmailStr, Field, field_validator
-from typing import Optional
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field, field_validator
+from typing import Annotated, Optional
+from dataclasses import dataclass
 from datetime import datetime
+from emval import EmailValidator
+import re
 import uuid
 
 
+# Email validation backed by emval (Rust); syntax only, no DNS deliverability lookups
+_email_validator = EmailValidator(deliverable_address=False)
+
+
+def _validate_email(v: str) -> str:
+    """Validate an email address and return its normalized form."""
+    try:
+        validated = _email_validator.validate_email(v)
+    except SyntaxError as e:
+        raise ValueError(f"value is not a valid email address: {e}") from e
+    # emval accepts dot-less domains (e.g. "a@b"); EmailStr rejected them, so keep doing so
+    if "." not in validated.ascii_domain:
+        raise ValueError(
+            "value is not a valid email address: The part after the @-sign is not valid. "
+            "It should have a period."
+        )
+    return validated.normalized
+
+
+EmailAddress = Annotated[str, AfterValidator(_validate_email)]
+
+
+# Password length and digit check; upper/lowercase use str.isupper/islower (any Unicode letter)
+_PW_RE = re.compile(r"(?=.*\d).{8,100}", re.DOTALL)
+
+# Allowed personalization values
+_SW_HW = frozenset({"beginner", "intermediate", "advanced"})
+_ROB = _SW_HW | {"none"}
+_ROLE = frozenset({"student", "professional", "hobbyist", "researcher"})
+
+
 class UserSignupRequest(BaseModel):
     """Request schema for user signup."""
-    email: EmailStr = Field(..., description="User's email address")
+    email: EmailAddress = Field(..., description="User's email address")
     password: str = Field(..., min_length=8, max_length=100, description="User's password")
     full_name: Optional[str] = Field(None, max_length=100, description="User's full name")
     
@@ -29,14 +63,15 @@ class UserSignupRequest(BaseModel):
     @classmethod
     def validate_password(cls, v: str) -> str:
         """Validate password complexity."""
-        if len(v) < 8:
-            raise ValueError("Password must be at least 8 characters long")
-        if not any(char.isdigit() for char in v):
-            raise ValueError("Password must contain at least one digit")
-        if not any(char.isupper() for char in v):
-            raise ValueError("Password must contain at least one uppercase letter")
-        if not any(char.islower() for char in v):
-            raise ValueError("Password must contain at least one lowercase letter")
+        if (
+            not _PW_RE.fullmatch(v)
+            or not any(char.isupper() for char in v)
+            or not any(char.islower() for char in v)
+        ):
+            raise ValueError(
+                "Password must be 8-100 characters long and contain at least one digit, "
+                "one uppercase letter and one lowercase letter"
+            )
         return v
     
     @field_validator("software_experience", "hardware_experience")
@@ -45,10 +80,10 @@ class UserSignupRequest(BaseModel):
         """Validate software/hardware experience level values if provided."""
         if v is None:
             return v
-        valid_values = ["beginner", "intermediate", "advanced"]
-        if v.lower() not in valid_values:
-            raise ValueError(f"Must be one of: {', '.join(valid_values)}")
-        return v.lower()
+        v = v.lower()
+        if v not in _SW_HW:
+            raise ValueError(f"Must be one of: {', '.join(sorted(_SW_HW))}")
+        return v
     
     @field_validator("robotics_experience")
     @classmethod
@@ -56,10 +91,10 @@ class UserSignupRequest(BaseModel):
         """Validate robotics experience level values if provided."""
         if v is None:
             return v
-        valid_values = ["none", "beginner", "intermediate", "advanced"]
-        if v.lower() not in valid_values:
-            raise ValueError(f"Must be one of: {', '.join(valid_values)}")
-        return v.lower()
+        v = v.lower()
+        if v not in _ROB:
+            raise ValueError(f"Must be one of: {', '.join(sorted(_ROB))}")
+        return v
     
     @field_validator("current_role")
     @classmethod
@@ -67,15 +102,15 @@ class UserSignupRequest(BaseModel):
         """Validate current role values if provided."""
         if v is None:
             return v
-        valid_values = ["student", "professional", "hobbyist", "researcher"]
-        if v.lower() not in valid_values:
-            raise ValueError(f"Must be one of: {', '.join(valid_values)}")
-        return v.lower()
+        v = v.lower()
+        if v not in _ROLE:
+            raise ValueError(f"Must be one of: {', '.join(sorted(_ROLE))}")
+        return v
 
 
 class UserSigninRequest(BaseModel):
     """Request schema for user signin."""
-    email: EmailStr = Field(..., description="User's email address")
+    email: EmailAddress = Field(..., description="User's email address")
     password: str = Field(..., description="User's password")
 
 
@@ -89,8 +124,7 @@ class UserResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True  # For Pydantic v2 (replaces orm_mode)
+    model_config = ConfigDict(from_attributes=True)
 
 
 class TokenResponse(BaseModel):
@@ -122,8 +156,8 @@ class ErrorResponse(BaseModel):
     success: bool = Field(default=False)
     error: dict = Field(..., description="Error details")
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "success": False,
                 "error": {
@@ -133,10 +167,12 @@ class ErrorResponse(BaseModel):
                 }
             }
         }
+    )
 
 
-class TokenData(BaseModel):
-    """Data extracted from JWT token."""
+@dataclass(slots=True, frozen=True)
+class TokenData:
+    """Data extracted from JWT token (already typed by AuthService.verify_token, so not re-validated)."""
     user_id: uuid.UUID
     email: str
     exp: datetime
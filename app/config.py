@@ -7,8 +7,10 @@ from typing import Optional
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from openai import OpenAI
+from slowapi import Limiter
+from slowapi.util import get_remote_address
 from dotenv import load_dotenv
 from app.utils.logger import setup_logger
 
@@ -79,8 +81,10 @@ QDRANT_URL = os.getenv("QDRANT_URL")
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
 QDRANT_COLLECTION_NAME = "physical_ai_textbook"
 
-# Initialize Qdrant client (will be None if credentials not provided)
+# Initialize Qdrant clients (will be None if credentials not provided)
+# The async client is for coroutines that must not block the event loop (e.g. /health)
 qdrant_client: Optional[QdrantClient] = None
+async_qdrant_client: Optional[AsyncQdrantClient] = None
 
 if QDRANT_URL and QDRANT_API_KEY:
     try:
@@ -89,10 +93,17 @@ if QDRANT_URL and QDRANT_API_KEY:
             api_key=QDRANT_API_KEY,
             timeout=30,  # 30 second timeout for operations
         )
+        async_qdrant_client = AsyncQdrantClient(
+            url=QDRANT_URL,
+            api_key=QDRANT_API_KEY,
+            timeout=30,
+            check_compatibility=False,  # The sync client above already ran the version check
+        )
         logger.info("Qdrant client initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize Qdrant client: {e}")
         qdrant_client = None
+        async_qdrant_client = None
 else:
     logger.warning("Qdrant credentials not provided - vector search will be unavailable")
 
@@ -145,6 +156,24 @@ LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
 RATE_LIMIT_PER_MINUTE = int(os.getenv("RATE_LIMIT_PER_MINUTE") or "10")
 
+# Rate limiter storage
+# With REDIS_URL set, counters live in Redis (atomic Lua moving-window) and are shared by
+# every worker process; otherwise each process keeps its own in-memory counters
+REDIS_URL = os.getenv("REDIS_URL")
+RATE_LIMIT_STORAGE_URI = REDIS_URL or "memory://"
+
+# Shared rate limiter - used by app.main and any route module that applies @limiter.limit
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=RATE_LIMIT_STORAGE_URI,
+    strategy="moving-window",
+)
+
+# Per-process counters only matter with several workers (same variables app.py / start.sh read)
+_workers = int(os.getenv("WEB_CONCURRENCY") or os.getenv("UVICORN_WORKERS") or 1)
+if not REDIS_URL and _workers > 1:
+    logger.warning(f"REDIS_URL not set with {_workers} workers - rate limits are tracked per worker process")
+
 # Embedding Configuration
 # FastEmbed (local, free) vs OpenAI (paid API)
 USE_FASTEMBED = os.getenv("USE_FASTEMBED", "true").lower() == "true"
@@ -2,58 +2,117 @@
 Physical AI Textbook Backend - RAG Chatbot
 FastAPI application entry point with CORS and middleware configuration
 """
+import asyncio
+import hashlib
 import os
-from fastapi import FastAPI, Request
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+import orjson
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import text
+from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from dotenv import load_dotenv
 
+from app.config import async_qdrant_client, engine, limiter
+from app.utils.logger import setup_logger
+
 # Load environment variables
 load_dotenv()
 
-# Initialize rate limiter
-limiter = Limiter(key_func=get_remote_address)
+# Development-only CORS pattern: localhost / 127.0.0.1 on any port
+# (CORSMiddleware full-matches it; the GitHub Pages origin is an exact entry in default_origins)
+_LOCAL_ORIGIN_REGEX = r"https?://(localhost|127\.0\.0\.1)(:\d+)?"
+
+# API router loading state: "loading" -> "ready"; reported by /health
+# (a failed load exits the process, see _install_routes_in_background)
+_routes_state = {"status": "loading"}
+# Retry-After (seconds) sent with the 503s served while the routers are loading
+ROUTES_RETRY_AFTER = "5"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start loading the API routers in the background; cancel the load and close clients on shutdown"""
+    # Keep a reference on app.state so the task is not garbage collected
+    app.state.routes_task = asyncio.create_task(_install_routes_in_background())
+    yield
+    app.state.routes_task.cancel()
+    if async_qdrant_client is not None:
+        await async_qdrant_client.close()
+
 
 # Create FastAPI app
 app = FastAPI(
+    lifespan=lifespan,
     title="Physical AI Textbook - RAG Chatbot API",
     description="Backend API for RAG-based chatbot with Qdrant vector search and OpenAI GPT-4",
     version="0.1.0",
     redirect_slashes=False,  # Disable automatic trailing slash redirects
+    default_response_class=ORJSONResponse,  # Serialize JSON responses with orjson
 )
 
 # Add rate limiter to app state
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
+
+class _RoutesLoadingMiddleware:
+    """Answer /api/* with 503 + Retry-After until the API routers are mounted (instead of 404)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            _routes_state["status"] != "ready"
+            and scope["type"] == "http"
+            and scope["path"].startswith("/api/")
+        ):
+            response = ORJSONResponse(
+                {"detail": "API is starting up, please retry shortly"},
+                status_code=503,
+                headers={"Retry-After": ROUTES_RETRY_AFTER},
+            )
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+
+# Added before CORSMiddleware so it runs inside it and the 503s carry CORS headers
+app.add_middleware(_RoutesLoadingMiddleware)
+
 # Configure CORS - MUST be added before routes
 # In development, allow all localhost origins (any port)
 # In production, use specific origins from environment
 is_development = os.getenv("ENVIRONMENT", "development").lower() == "development"
 
-# Parse CORS origins
+
+def _normalize_origin(origin: str) -> str:
+    """
+    Reduce a configured origin to scheme://netloc - the form browsers send in the Origin header
+    e.g., "https://hamza123545.github.io/physical-ai-book/" -> "https://hamza123545.github.io"
+    
+    Raises ValueError for entries that can never match an Origin header (e.g. missing scheme),
+    so a bad CORS_ORIGINS value fails at startup instead of silently blocking the frontend
+    """
+    parsed = urlparse(origin.rstrip("/"))
+    if parsed.scheme not in ("http", "https") or not parsed.netloc:
+        raise ValueError(f"Invalid CORS origin {origin!r} - expected http(s)://host[:port]")
+    # Reconstruct with just scheme and netloc (no path)
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+
+# Parse CORS origins - remove paths and trailing slashes
 env_origins_str = os.getenv("CORS_ORIGINS", "")
-env_origins = []
-if env_origins_str:
-    # Parse and clean origins - remove paths and trailing slashes
-    for origin in env_origins_str.split(","):
-        origin = origin.strip()
-        if origin:
-            # Remove trailing slash
-            origin = origin.rstrip("/")
-            # Extract just protocol + domain (remove path if present)
-            # e.g., "https://hamza123545.github.io/physical-ai-book" -> "https://hamza123545.github.io"
-            try:
-                from urllib.parse import urlparse
-                parsed = urlparse(origin)
-                # Reconstruct with just scheme and netloc (no path)
-                clean_origin = f"{parsed.scheme}://{parsed.netloc}"
-                env_origins.append(clean_origin)
-            except Exception:
-                # Fallback: just use the origin as-is if parsing fails
-                env_origins.append(origin)
+env_origins = [
+    _normalize_origin(origin.strip())
+    for origin in env_origins_str.split(",")
+    if origin.strip()
+]
 
 # Default production origins (GitHub Pages frontend)
 # IMPORTANT: CORS origin is just protocol + domain, NOT the path
@@ -64,43 +123,48 @@ default_origins = [
     "http://localhost:3001",
 ]
 
-# Combine environment origins with defaults (avoid duplicates)
-all_origins = list(set(env_origins + default_origins))
+# Combine environment origins with defaults (avoid duplicates, keep insertion order)
+all_origins = tuple(dict.fromkeys(env_origins + default_origins))
+# Resolved once at import: CORSMiddleware checks request origins against this hashed set
+_ALLOWED_ORIGINS = frozenset(all_origins)
 
-# Log for debugging
-import logging
-logger = logging.getLogger(__name__)
+# Log for debugging (level follows LOG_LEVEL, INFO by default)
+logger = setup_logger(__name__)
 logger.info(f"CORS configuration - Environment: {is_development}, Allowed origins: {all_origins}")
-print(f"CORS allowed origins: {all_origins}")
 
+# CORSMiddleware answers all preflight (OPTIONS) requests itself, so no explicit
+# OPTIONS route is needed; browsers cache the answer for max_age seconds
 if is_development:
-    # Development: Allow all localhost origins (any port)
+    # Development: Allow all localhost origins (any port) plus the configured origins
     app.add_middleware(
         CORSMiddleware,
-        allow_origin_regex=r"https?://(localhost|127\.0\.0\.1)(:\d+)?",
+        allow_origins=_ALLOWED_ORIGINS,
+        allow_origin_regex=_LOCAL_ORIGIN_REGEX,
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
         expose_headers=["*"],
+        max_age=86400,  # Cache preflight for 24 hours
     )
 else:
-    # Production: Use specific origins with regex support for GitHub Pages
-    # Allow both exact match and any subdomain/path under GitHub Pages
+    # Production: exact origins only (GitHub Pages frontend + CORS_ORIGINS)
+    # No origin regex - with credentials allowed, a loose pattern would admit look-alike hosts
     app.add_middleware(
         CORSMiddleware,
-        allow_origins=all_origins,
-        allow_origin_regex=r"https://hamza123545\.github\.io.*",  # Allow any path under GitHub Pages
+        allow_origins=_ALLOWED_ORIGINS,
         allow_credentials=True,
         allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH", "HEAD"],
         allow_headers=["*"],
         expose_headers=["*"],
-        max_age=3600,  # Cache preflight for 1 hour
+        max_age=86400,  # Cache preflight for 24 hours
     )
 
 
 @app.get("/")
-async def root():
+async def root(response: Response):
     """Health check endpoint"""
+    # Static body - let browsers, CDNs and the HF Spaces edge reuse it briefly
+    response.headers["Cache-Control"] = "public, max-age=10"
     return {
         "status": "online",
         "service": "Physical AI Textbook RAG Chatbot",
@@ -108,145 +172,188 @@ async def root():
     }
 
 
-@app.get("/health")
-async def health_check():
-    """Detailed health check for monitoring and Docker health checks"""
-    from app.config import engine, QDRANT_CLIENT
-    from sqlalchemy import text
-    
+# Short-lived cache so bursts of liveness probes collapse into one real DB + Qdrant check
+HEALTH_CACHE_TTL = 2.0  # seconds
+# Long enough for a cold TLS handshake to Qdrant Cloud, well inside the 10s Docker HEALTHCHECK timeout
+QDRANT_PROBE_TIMEOUT = 3.0  # seconds
+# Bounds a stuck pool checkout / query; the probes run under _health_lock, so one hang would stall every caller
+DB_PROBE_TIMEOUT = 3.0  # seconds
+_health_cache = {"t": 0.0, "v": None, "etag": None}
+_health_lock = asyncio.Lock()
+
+
+def _check_database():
+    """Blocking SELECT 1 against the database (run in a worker thread)"""
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+
+def _mark_degraded(health_status: dict):
+    """Downgrade a healthy status to degraded (never upgrades a failed one)"""
+    if health_status["status"] == "healthy":
+        health_status["status"] = "degraded"
+
+
+async def _probe_health() -> dict:
+    """Run the actual database and Qdrant connectivity checks without blocking the event loop"""
     health_status = {
         "status": "healthy",
         "service": "Physical AI Textbook RAG Chatbot",
         "version": "0.1.0"
     }
     
+    # API routers load in the background after startup (see _install_routes_in_background)
+    health_status["api"] = _routes_state["status"]
+    if _routes_state["status"] != "ready":
+        health_status["status"] = "degraded"
+    
     # Check database connection
     try:
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
+        await asyncio.wait_for(asyncio.to_thread(_check_database), timeout=DB_PROBE_TIMEOUT)
         health_status["database"] = "connected"
+    except asyncio.TimeoutError:
+        health_status["database"] = f"error: timed out after {DB_PROBE_TIMEOUT}s"
+        _mark_degraded(health_status)
     except Exception as e:
         health_status["database"] = f"error: {str(e)[:50]}"
-        health_status["status"] = "degraded"
+        _mark_degraded(health_status)
     
     # Check Qdrant connection
     try:
-        if QDRANT_CLIENT:
-            QDRANT_CLIENT.get_collections()
+        if async_qdrant_client:
+            await asyncio.wait_for(async_qdrant_client.get_collections(), timeout=QDRANT_PROBE_TIMEOUT)
             health_status["qdrant"] = "connected"
         else:
             health_status["qdrant"] = "not_configured"
+    except asyncio.TimeoutError:
+        health_status["qdrant"] = f"error: timed out after {QDRANT_PROBE_TIMEOUT}s"
+        _mark_degraded(health_status)
     except Exception as e:
         health_status["qdrant"] = f"error: {str(e)[:50]}"
-        health_status["status"] = "degraded"
+        _mark_degraded(health_status)
     
     return health_status
 
 
+def _health_etag(health_status: dict) -> str:
+    """Strong ETag derived from the health status body"""
+    digest = hashlib.sha1(orjson.dumps(health_status, option=orjson.OPT_SORT_KEYS)).hexdigest()
+    return f'"{digest}"'
 
-# Middleware to add CORS headers to all responses (backup for CORSMiddleware)
-# This runs AFTER CORSMiddleware to ensure headers are always set
-@app.middleware("http")
-async def add_cors_headers_backup(request: Request, call_next):
-    """Add CORS headers to all responses as backup"""
-    import re
-    from urllib.parse import urlparse
-    
-    response = await call_next(request)
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    If-None-Match evaluation per RFC 9110: "*" matches any current representation,
+    otherwise the header is a comma-separated list compared weakly (W/ prefix ignored)
+    """
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+
+
+def _cached_health():
+    """Return the cached (health status, ETag) if still fresh, else None"""
+    if _health_cache["v"] is not None and time.monotonic() - _health_cache["t"] < HEALTH_CACHE_TTL:
+        return _health_cache["v"], _health_cache["etag"]
+    return None
+
+
+async def _get_health():
+    """Return (health status, ETag), probing at most once per HEALTH_CACHE_TTL"""
+    cached = _cached_health()
+    if cached is not None:
+        return cached
     
-    # Only add headers if not already set by CORSMiddleware
-    if "Access-Control-Allow-Origin" not in response.headers:
-        # Get origin from request
-        origin = request.headers.get("origin", "")
+    async with _health_lock:
+        # Another request may have refreshed the cache while we waited for the lock
+        cached = _cached_health()
+        if cached is not None:
+            return cached
         
-        # Determine allowed origin
-        allowed_origin = None
-        
-        # Check if origin is in allowed list
-        if origin in all_origins:
-            allowed_origin = origin
-        # Check if origin matches GitHub Pages pattern
-        elif origin and re.match(r"https://hamza123545\.github\.io.*", origin):
-            # Extract base origin (without path)
-            parsed = urlparse(origin)
-            allowed_origin = f"{parsed.scheme}://{parsed.netloc}"
-        # Check if origin is localhost (for development)
-        elif origin and re.match(r"https?://(localhost|127\.0\.0\.1)(:\d+)?", origin):
-            allowed_origin = origin
-        
-        # If origin is allowed, add CORS headers
-        if allowed_origin:
-            response.headers["Access-Control-Allow-Origin"] = allowed_origin
-            response.headers["Access-Control-Allow-Credentials"] = "true"
-            response.headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, DELETE, OPTIONS, PATCH, HEAD"
-            response.headers["Access-Control-Allow-Headers"] = "*"
-            response.headers["Access-Control-Expose-Headers"] = "*"
-    
-    return response
+        health_status = await _probe_health()
+        _health_cache["v"] = health_status
+        _health_cache["etag"] = _health_etag(health_status)
+        _health_cache["t"] = time.monotonic()
+        return health_status, _health_cache["etag"]
 
 
-# API routes
-from app.api import embeddings_routes, chat_routes, chatkit_routes, content_routes
-from app.api.user import routes as user_routes
-from app.auth import routes as auth_routes
-
-app.include_router(embeddings_routes.router, prefix="/api/embeddings", tags=["embeddings"])
-app.include_router(chat_routes.router, prefix="/api/chat", tags=["chat"])
-# ChatKit session endpoint (minimal backend needed for client_secret generation)
-app.include_router(chatkit_routes.router, prefix="/api/chatkit", tags=["chatkit"])
-# Authentication routes
-app.include_router(auth_routes.router, prefix="/api/auth", tags=["authentication"])
-# User background routes
-app.include_router(user_routes.router, prefix="/api/user", tags=["user"])
-# Content personalization routes
-app.include_router(content_routes.router, prefix="/api/content", tags=["content"])
-
-
-# Explicit OPTIONS handler for all API routes (AFTER routes are included)
-# This handles CORS preflight requests explicitly as fallback
-@app.options("/api/{full_path:path}")
-async def options_api_handler(full_path: str, request: Request):
-    """Handle CORS preflight requests for API routes"""
-    from fastapi import Response
-    import re
-    
-    # Get origin from request
-    origin = request.headers.get("origin", "")
-    
-    # Log for debugging
-    logger.info(f"OPTIONS request for /api/{full_path} from origin: {origin}")
-    print(f"OPTIONS request for /api/{full_path} from origin: {origin}, Allowed origins: {all_origins}")
-    
-    # Determine allowed origin
-    allowed_origin = None
+@app.get("/health")
+async def health_check(request: Request, response: Response):
+    """Detailed health check for monitoring and Docker health checks"""
+    health_status, etag = await _get_health()
     
-    # Check if origin is in allowed list
-    if origin in all_origins:
-        allowed_origin = origin
-    # Check if origin matches GitHub Pages pattern
-    elif origin and re.match(r"https://hamza123545\.github\.io.*", origin):
-        # Extract base origin (without path)
-        from urllib.parse import urlparse
-        parsed = urlparse(origin)
-        allowed_origin = f"{parsed.scheme}://{parsed.netloc}"
-    # Check if origin is localhost (for development)
-    elif origin and re.match(r"https?://(localhost|127\.0\.0\.1)(:\d+)?", origin):
-        allowed_origin = origin
+    # Not ready to serve traffic until the API routers are mounted: 503 keeps
+    # curl -f (healthcheck.sh) and platform health checks from routing to this instance
+    if _routes_state["status"] != "ready":
+        return ORJSONResponse(
+            health_status,
+            status_code=503,
+            headers={"Retry-After": ROUTES_RETRY_AFTER, "Cache-Control": "no-store"},
+        )
     
-    # If no match, use default GitHub Pages origin
-    if not allowed_origin:
-        allowed_origin = "https://hamza123545.github.io"
+    # Callers that already hold this status get a bodiless 304
+    # no-cache: caches may store the body but must revalidate with the ETag each time
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
     
-    logger.info(f"OPTIONS response: 200 OK, Allowed-Origin: {allowed_origin}")
-    print(f"OPTIONS response: 200 OK, Allowed-Origin: {allowed_origin}")
+    response.headers.update(headers)
+    return health_status
+
+
+# API routes
+# The route modules pull in OpenAI, Qdrant, FastEmbed and the Agents SDK, which makes
+# importing them slow. They are loaded in a worker thread once the server has started,
+# so uvicorn binds and /health answers while the heavy dependencies warm up; until
+# loading finishes /api/* and /health return 503 ("api": "loading" in the health body).
+def _load_routers():
+    """Import the API route modules and return (router, prefix, tags) entries"""
+    from app.api import embeddings_routes, chat_routes, chatkit_routes, content_routes
+    from app.api.user import routes as user_routes
+    from app.auth import routes as auth_routes
+
+    return [
+        (embeddings_routes.router, "/api/embeddings", ["embeddings"]),
+        (chat_routes.router, "/api/chat", ["chat"]),
+        # ChatKit session endpoint (minimal backend needed for client_secret generation)
+        (chatkit_routes.router, "/api/chatkit", ["chatkit"]),
+        # Authentication routes
+        (auth_routes.router, "/api/auth", ["authentication"]),
+        # User background routes
+        (user_routes.router, "/api/user", ["user"]),
+        # Content personalization routes
+        (content_routes.router, "/api/content", ["content"]),
+    ]
+
+
+def _install_routes(routers):
+    """Mount the API routers on the app"""
+    for router, prefix, tags in routers:
+        app.include_router(router, prefix=prefix, tags=tags)
+    # Drop any OpenAPI schema generated before the routes were mounted
+    app.openapi_schema = None
+
+
+async def _install_routes_in_background():
+    """
+    Load the route modules off the event loop, then mount them
     
-    return Response(
-        status_code=200,
-        headers={
-            "Access-Control-Allow-Origin": allowed_origin,
-            "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS, PATCH, HEAD",
-            "Access-Control-Allow-Headers": "*",
-            "Access-Control-Allow-Credentials": "true",
-            "Access-Control-Max-Age": "3600",
-        }
-    )
+    If loading fails the process exits: running on without any API routes would only
+    serve 503s, whereas exiting lets Docker / HF Spaces / Render restart the app.
+    With WEB_CONCURRENCY > 1 the exiting process is a uvicorn worker, and the uvicorn
+    supervisor respawns it rather than the container restarting, so a persistent import
+    error shows up as a worker crash loop in the logs while /health keeps returning 503
+    """
+    try:
+        routers = await asyncio.to_thread(_load_routers)
+        _install_routes(routers)
+    except Exception as e:
+        logger.critical(f"Failed to load API routes, shutting down: {e}", exc_info=True)
+        # Hard exit with a non-zero code (a graceful SIGTERM shutdown would exit 0)
+        os._exit(1)
+    else:
+        _routes_state["status"] = "ready"
+        # Don't keep serving a cached "loading" health status
+        _health_cache["v"] = None
+        logger.info("API routes installed")
@@ -4,5 +4,9 @@
 
 PORT=${PORT:-7860}
 # Try health endpoint, if it fails try root endpoint
-curl -f http://localhost:${PORT}/health 2>/dev/null || curl -f http://localhost:${PORT}/ 2>/dev/null || exit 1
-
+curl -f http://localhost:${PORT}/health 2>/dev/null
+status=$?
+[ $status -eq 0 ] && exit 0
+# 22 = /health answered with an HTTP error (e.g. 503 while the API routes load) - don't mask it with /
+[ $status -eq 22 ] && exit 1
+curl -f http://localhost:${PORT}/ 2>/dev/null || exit 1
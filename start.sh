@@ -50,8 +50,11 @@ uv run alembic upgrade head || {
 # Hugging Face Spaces uses PORT environment variable (default 7860)
 # Render uses PORT (default 8000)
 PORT=${PORT:-7860}
+# Worker processes: opt in with WEB_CONCURRENCY (or UVICORN_WORKERS), default 1
+# Each worker loads the ML/LLM stack and its own DB pool, so scale up deliberately
+WORKERS=${WEB_CONCURRENCY:-${UVICORN_WORKERS:-1}}
 echo "=========================================="
-echo "Starting server on port $PORT..."
+echo "Starting server on port $PORT with $WORKERS workers..."
 echo "=========================================="
 
 # Use exec to replace shell process with uvicorn
@@ -59,7 +62,10 @@ echo "=========================================="
 exec uv run uvicorn app.main:app \
     --host 0.0.0.0 \
     --port $PORT \
-    --workers 1 \
+    --workers $WORKERS \
+    --loop uvloop \
+    --http httptools \
+    --no-access-log \
     --timeout-keep-alive 30 \
     --timeout-graceful-shutdown 10 \
     --log-level info